@@ -1,22 +1,31 @@
 import os
 import re
+import asyncio
+import threading
 import ssl
 import smtplib
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
+from functools import lru_cache
+from html import unescape
 from urllib.parse import urljoin, urlparse
 from email.message import EmailMessage
 from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi import FastAPI, Request, HTTPException, Query, Depends
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, Text, DateTime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from lxml import etree, html as lxml_html
 
 # ---------- .env (optional) ----------
 try:
@@ -25,6 +34,12 @@ try:
 except Exception:
     pass
 
+# ---------- orjson (optional, faster JSON decode) ----------
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # ---------- FastAPI ----------
 app = FastAPI(title="JobWatch Local")
 templates = Jinja2Templates(directory="templates")
@@ -44,17 +59,81 @@ class Company(Base):
     detail_fetch_limit = Column(Integer, nullable=False, default=40)
     active = Column(Boolean, nullable=False, default=True)
 
+class JobDetail(Base):
+    """Posted date last seen on a job detail page, plus validators for conditional GETs."""
+    __tablename__ = "job_details"
+    link = Column(Text, primary_key=True)
+    etag = Column(Text, nullable=True)
+    last_modified = Column(Text, nullable=True)
+    posted_dt = Column(DateTime, nullable=True)
+    posted_text = Column(Text, nullable=True)
+    fetched_at = Column(DateTime, nullable=False)
+
 DB_URL = "sqlite:///jobs.db"
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL + synchronous=NORMAL: commits append to the log instead of fsyncing the main DB file.
+    cur = dbapi_conn.cursor()
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY", "cache_size=-20000"):
+        cur.execute(f"PRAGMA {pragma}")
+    cur.close()
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base.metadata.create_all(engine)
 
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# The companies table only changes through the routes below, so reads are served from an
+# in-memory snapshot that every mutating route drops after it commits.
+_company_cache: Optional[Dict[int, Dict[str, Any]]] = None
+_company_cache_lock = threading.Lock()
+
+def company_snapshot() -> Dict[int, Dict[str, Any]]:
+    global _company_cache
+    with _company_cache_lock:
+        if _company_cache is None:
+            with SessionLocal() as db:
+                _company_cache = {
+                    c.id: {
+                        "id": c.id, "name": c.name, "list_url": c.list_url,
+                        "role_keywords": c.role_keywords, "max_age_days": c.max_age_days,
+                        "detail_fetch_limit": c.detail_fetch_limit, "active": c.active
+                    }
+                    for c in db.query(Company).order_by(Company.id.desc()).all()
+                }
+        return _company_cache
+
+async def company_snapshot_async() -> Dict[int, Dict[str, Any]]:
+    # Hits are a plain read; only a cold cache goes to SQLite, on a worker thread.
+    cache = _company_cache
+    if cache is not None:
+        return cache
+    return await asyncio.to_thread(company_snapshot)
+
+def invalidate_company_cache():
+    global _company_cache
+    with _company_cache_lock:
+        _company_cache = None
+
 # ---------- Helpers ----------
 def parse_keywords(csv: Optional[str]) -> List[str]:
     if not csv:
         return []
     return [k.strip().lower() for k in csv.split(",") if k.strip()]
 
+def keywords_regex(keys: List[str]) -> Optional[re.Pattern]:
+    """One case-insensitive alternation for title filtering; None means match everything."""
+    if not keys:
+        return None
+    return re.compile("|".join(re.escape(k) for k in keys), re.I)
+
 def origin_from(url: str) -> str:
     p = urlparse(url)
     return f"{p.scheme}://{p.netloc}"
@@ -66,52 +145,47 @@ MONTH_INDEX = {
     "aug": 8, "august": 8, "sep": 9, "september": 9, "oct": 10, "october": 10,
     "nov": 11, "november": 11, "dec": 12, "december": 12
 }
-DATE_RE = re.compile(r"\b(\d{1,2}/\d{1,2}/\d{4})\b")
-ISO_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
-MONTH_NAME_DATE_RE = re.compile(
-    r"\b(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|"
-    r"Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?)\s+(\d{1,2}),\s*(\d{4})\b",
+# One alternation so parse_possible_date scans its input once; the leftmost date wins.
+COMBINED_DATE_RE = re.compile(
+    r"\b(?P<iso>\d{4}-\d{2}-\d{2})\b"
+    r"|\b(?P<named>(?P<mon>Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|"
+    r"Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(?P<day>\d{1,2}),\s*(?P<year>\d{4}))\b"
+    r"|\b(?P<mdy>\d{1,2}/\d{1,2}/\d{4})\b"
+    r"|(?P<rel>(?P<n>\d+)\s+(?P<unit>day|days|hour|hours|week|weeks|month|months)\s+ago)",
     re.I,
 )
-RELATIVE_RE = re.compile(r"(\d+)\s+(day|days|hour|hours|week|weeks|month|months)\s+ago", re.I)
+DIGIT_RE = re.compile(r"\d")
+RELATIVE_UNITS = {
+    "hour": timedelta(hours=1), "hours": timedelta(hours=1),
+    "day": timedelta(days=1),   "days": timedelta(days=1),
+    "week": timedelta(weeks=1), "weeks": timedelta(weeks=1),
+    "month": timedelta(days=30), "months": timedelta(days=30),
+}
 UPDATED_LABEL_RE = re.compile(
     r"(Updated|Posted)\s*:?\s*(?P<date>(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{4})|"
     r"(?:[A-Za-z]{3,9}\s+\d{1,2},\s*\d{4}))",
     re.I,
 )
 
-def parse_possible_date(text: str):
-    if not text:
+def parse_possible_date(text: str, now: Optional[datetime] = None):
+    """Return (matched_text, datetime) for the first date in text; relative dates count back from now."""
+    # Every supported form contains a digit; most anchor text has none.
+    if not text or not DIGIT_RE.search(text):
         return None, None
-    m = ISO_DATE_RE.search(text)
-    if m:
+    for m in COMBINED_DATE_RE.finditer(text):
+        kind = m.lastgroup
         try:
-            return m.group(1), datetime.strptime(m.group(1), "%Y-%m-%d")
-        except:
-            pass
-    m = MONTH_NAME_DATE_RE.search(text)
-    if m:
-        try:
-            mon = MONTH_INDEX[m.group(1).lower()]
-            return m.group(0), datetime(int(m.group(3)), mon, int(m.group(2)))
-        except:
-            pass
-    m = DATE_RE.search(text)
-    if m:
-        try:
-            return m.group(1), datetime.strptime(m.group(1), "%m/%d/%Y")
-        except:
-            pass
-    m = RELATIVE_RE.search(text)
-    if m:
-        n = int(m.group(1)); unit = m.group(2).lower()
-        delta = {
-            "hour": timedelta(hours=n), "hours": timedelta(hours=n),
-            "day": timedelta(days=n),   "days": timedelta(days=n),
-            "week": timedelta(weeks=n), "weeks": timedelta(weeks=n),
-            "month": timedelta(days=30*n), "months": timedelta(days=30*n),
-        }[unit]
-        return m.group(0), datetime.utcnow() - delta
+            if kind == "iso":
+                return m.group("iso"), datetime.strptime(m.group("iso"), "%Y-%m-%d")
+            if kind == "named":
+                mon = MONTH_INDEX[m.group("mon").lower()]
+                return m.group("named"), datetime(int(m.group("year")), mon, int(m.group("day")))
+            if kind == "mdy":
+                return m.group("mdy"), datetime.strptime(m.group("mdy"), "%m/%d/%Y")
+            delta = int(m.group("n")) * RELATIVE_UNITS[m.group("unit").lower()]
+            return m.group("rel"), (now or datetime.utcnow()) - delta
+        except (ValueError, OverflowError):
+            continue
     return None, None
 
 # ---------- Amazon scraping ----------
@@ -119,7 +193,12 @@ HTTP_TIMEOUT = 30
 AMAZON_BASE = "https://www.amazon.jobs/en/"
 AMAZON_ROOT = "https://www.amazon.jobs"
 JOB_PATH_RE = re.compile(r"^(/en)?/jobs/")
+LOCATION_RE = re.compile("|".join(map(re.escape, (
+    "United States", "India", "Canada", "Remote", "Hybrid", "Seattle", "Bangalore", "Hyderabad",
+))))
 
+# Listing pages repeat the same hrefs many times, so most calls are cache hits.
+@lru_cache(maxsize=8192)
 def normalize_amazon_link(link: str) -> str:
     if not link:
         return ""
@@ -128,29 +207,68 @@ def normalize_amazon_link(link: str) -> str:
         if "amazon.jobs" in link and "/jobs/" in link:
             return link
         return ""
-    if JOB_PATH_RE.search(link):
+    if JOB_PATH_RE.match(link):
         return urljoin(AMAZON_ROOT, link)
     return ""
 
-def make_amazon_session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/119.0 Safari/537.36"),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
-                  "application/json;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": AMAZON_BASE,
-        "Cache-Control": "no-cache", "Pragma": "no-cache",
-    })
+AMAZON_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                   "AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/119.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
+              "application/json;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": AMAZON_BASE,
+    "Cache-Control": "no-cache", "Pragma": "no-cache",
+}
+DETAIL_FETCH_CONCURRENCY = 10
+DETAIL_CACHE_DAYS = 7
+# JSON-LD and meta tags live in <head>; read only this much of a detail page at first.
+DETAIL_HEAD_BYTES = 64 * 1024
+DETAIL_MAX_BYTES = 256 * 1024
+# HTML parsing is CPU-bound; run it in worker processes so the event loop keeps serving I/O.
+# Workers start lazily, once uvicorn/anyio threads exist, so never fork this process: a
+# forkserver (spawn where that's unavailable) starts them from a clean single-threaded parent.
+PARSE_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+def _new_parse_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=PARSE_POOL_CONTEXT)
+
+PARSE_POOL = _new_parse_pool()
+
+async def run_in_parse_pool(fn, *args):
+    """Run fn(*args) in PARSE_POOL. A crashed worker breaks the whole pool, so replace it and
+    retry once; a second BrokenProcessPool propagates and fails the run."""
+    global PARSE_POOL
+    loop = asyncio.get_running_loop()
+    pool = PARSE_POOL
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        if PARSE_POOL is pool:  # only the first caller to notice swaps it (all on the loop thread)
+            PARSE_POOL = _new_parse_pool()
+            pool.shutdown(wait=False)
+        return await loop.run_in_executor(PARSE_POOL, fn, *args)
+
+async def make_amazon_client() -> httpx.AsyncClient:
+    # One keep-alive pool for the whole run; with HTTP/2 the detail fetches multiplex
+    # over a single TLS connection. retries= only re-attempts failed connects.
+    transport = httpx.AsyncHTTPTransport(
+        http2=True, retries=2,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=20),
+    )
+    client = httpx.AsyncClient(
+        transport=transport, headers=AMAZON_HEADERS, timeout=HTTP_TIMEOUT, follow_redirects=True,
+    )
     try:
-        s.get(AMAZON_BASE, timeout=HTTP_TIMEOUT)
+        await client.head(AMAZON_ROOT)  # open the connection and pick up cookies
     except Exception:
         pass
-    return s
+    return client
 
-def try_amazon_json(s: requests.Session, role_keywords: List[str]) -> List[Dict[str, Any]]:
+async def try_amazon_json(client: httpx.AsyncClient, kw_re: Optional[re.Pattern]) -> List[Dict[str, Any]]:
     candidates = [
         ("https://www.amazon.jobs/en/search.json",
          [("result_limit", "100"), ("offset", "0"), ("category[]", "Software Development")]),
@@ -159,173 +277,327 @@ def try_amazon_json(s: requests.Session, role_keywords: List[str]) -> List[Dict[
         ("https://www.amazon.jobs/en/search.json",
          [("result_limit", "100"), ("offset", "0"), ("query", "software")]),
     ]
-    jobs = []
-    for url, params in candidates:
+
+    async def fetch(url: str, params: List[tuple]) -> List[Dict[str, Any]]:
         try:
-            r = s.get(url, params=params, timeout=HTTP_TIMEOUT)
-            if not r.ok:
-                continue
-            data = r.json()
+            r = await client.get(url, params=params)
+            if not r.is_success:
+                return []
+            return _jobs_from_search_json(json_loads(r.content), kw_re)
         except Exception:
-            continue
+            return []
 
-        lists = []
-        if isinstance(data, dict):
-            for key in ("jobs", "search_results", "results", "hits", "items"):
-                if key in data and isinstance(data[key], list):
-                    lists.append(data[key])
-            if not lists:
-                for v in data.values():
-                    if isinstance(v, list) and v and isinstance(v[0], dict):
-                        lists.append(v)
-
-        for lst in lists:
-            for it in lst:
-                title = (it.get("title") or it.get("job_title") or "").strip()
-                if not title or (role_keywords and not any(k in title.lower() for k in role_keywords)):
-                    continue
-                link = (it.get("job_path") or it.get("absolute_url") or "").strip()
-                if not link:
-                    link = (it.get("apply_url") or it.get("url_next_step") or "").strip()
-                link = normalize_amazon_link(link)
-                if not link:
-                    continue
-                location = (it.get("location") or it.get("normalized_location") or it.get("city") or "") or ""
-                posted_text = (it.get("posted_date") or it.get("posting_date") or it.get("posted_at") or "")
-                _, posted_dt = parse_possible_date(str(posted_text))
-                jobs.append({
-                    "title": title, "link": link, "location": location,
-                    "posted_text": str(posted_text) if posted_text else "",
-                    "_posted_dt": posted_dt,
-                })
-        if jobs:
-            break
+    # All candidates are in flight at once, but the first one *in candidate order* with jobs
+    # wins, as with sequential tries; the rest are cancelled as soon as that is known.
+    tasks = [asyncio.ensure_future(fetch(url, params)) for url, params in candidates]
+    jobs = []
+    try:
+        for t in tasks:
+            jobs = await t
+            if jobs:
+                break
+    finally:
+        for t in tasks:
+            t.cancel()
 
     uniq = {(j["title"], j["link"]): j for j in jobs if j.get("link")}
     return list(uniq.values())
 
-def extract_from_amazon_html(html: str, role_keywords: List[str]) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
-    anchors = soup.find_all("a", href=True)
+def _jobs_from_search_json(data: Any, kw_re: Optional[re.Pattern]) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    jobs = []
+    lists = []
+    if isinstance(data, dict):
+        for key in ("jobs", "search_results", "results", "hits", "items"):
+            if key in data and isinstance(data[key], list):
+                lists.append(data[key])
+        if not lists:
+            for v in data.values():
+                if isinstance(v, list) and v and isinstance(v[0], dict):
+                    lists.append(v)
+
+    for lst in lists:
+        for it in lst:
+            title = (it.get("title") or it.get("job_title") or "").strip()
+            if not title or (kw_re and not kw_re.search(title)):
+                continue
+            link = (it.get("job_path") or it.get("absolute_url") or "").strip()
+            if not link:
+                link = (it.get("apply_url") or it.get("url_next_step") or "").strip()
+            link = normalize_amazon_link(link)
+            if not link:
+                continue
+            location = (it.get("location") or it.get("normalized_location") or it.get("city") or "") or ""
+            posted_text = (it.get("posted_date") or it.get("posting_date") or it.get("posted_at") or "")
+            _, posted_dt = parse_possible_date(str(posted_text), now)
+            jobs.append({
+                "title": title, "link": link, "location": location,
+                "posted_text": str(posted_text) if posted_text else "",
+                "_posted_dt": posted_dt,
+            })
+    return jobs
+
+def extract_from_amazon_html(html: str, kw_re: Optional[re.Pattern]) -> List[Dict[str, Any]]:
+    try:
+        tree = lxml_html.fromstring(html)
+    except Exception:
+        return []
+    now = datetime.utcnow()
     jobs = []
-    for a in anchors:
-        link = normalize_amazon_link(a["href"].strip())
-        if not link:
+    seen = set()
+    for a in tree.xpath("//a[@href]"):
+        link = normalize_amazon_link(a.get("href").strip())
+        if not link or link in seen:
             continue
-        title = a.get_text(strip=True)
-        if not title or (role_keywords and not any(k in title.lower() for k in role_keywords)):
+        title = " ".join(a.text_content().split())
+        if not title or (kw_re and not kw_re.search(title)):
             continue
-        parent = a.find_parent()
-        block_text = parent.get_text(" ", strip=True) if parent else title
-        location = ""
-        for kw in ["United States", "India", "Canada", "Remote", "Hybrid", "Seattle", "Bangalore", "Hyderabad"]:
-            if kw in block_text:
-                location = kw; break
-        posted_text, posted_dt = parse_possible_date(block_text)
+        # Listing cards repeat the same job link; only the first matching anchor pays for
+        # the parent text walk and date scan.
+        seen.add(link)
+        parent = a.getparent()
+        block_text = " ".join(parent.text_content().split()) if parent is not None else title
+        m = LOCATION_RE.search(block_text)
+        location = m.group(0) if m else ""
+        posted_text, posted_dt = parse_possible_date(block_text, now)
         jobs.append({
             "title": title, "link": link, "location": location,
             "posted_text": posted_text or "", "_posted_dt": posted_dt,
         })
+    return jobs
+
+async def try_amazon_html(client: httpx.AsyncClient, kw_re: Optional[re.Pattern]) -> List[Dict[str, Any]]:
+    reqs = [
+        (urljoin(AMAZON_BASE, "job_categories/software-development"), None),
+        (urljoin(AMAZON_BASE, "search"), {"category": "Software Development"}),
+        (urljoin(AMAZON_BASE, "search"), {"query": "software"}),
+    ]
+    results = await asyncio.gather(*[client.get(url, params=p) for url, p in reqs], return_exceptions=True)
+    parsed = await asyncio.gather(*[
+        run_in_parse_pool(extract_from_amazon_html, r.text, kw_re)
+        for r in results if not isinstance(r, Exception) and r.is_success
+    ], return_exceptions=True)
+    jobs = []
+    for p in parsed:
+        if isinstance(p, BrokenProcessPool):
+            raise p  # no parser left; an empty result here would read as "no jobs"
+        if not isinstance(p, Exception):
+            jobs += p
     uniq = {(j["title"], j["link"]): j for j in jobs}
     return list(uniq.values())
 
-def try_amazon_html(s: requests.Session, role_keywords: List[str]) -> List[Dict[str, Any]]:
-    jobs = []
+LD_JSON_RE = re.compile(r'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.S | re.I)
+# A tag's insides, where a ">" inside a quoted attribute value does not end the tag.
+TAG_BODY = r"""(?:[^>"']|"[^"]*"|'[^']*'|["'])*"""
+META_TAG_RE = re.compile(r"<meta\b" + TAG_BODY + ">", re.I)
+META_ATTR_RE = re.compile(
+    r"""(?<![\w-])(property|content)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""", re.I
+)
+META_DATE_PROPERTIES = ("article:published_time", "article:modified_time", "og:updated_time")
+# Markup a reader never sees; "$" covers a block cut open by the capped fetch.
+NON_TEXT_RE = re.compile(
+    r"<script\b.*?(?:</script\s*>|$)|<style\b.*?(?:</style\s*>|$)|<!--.*?(?:-->|$)", re.S | re.I
+)
+TAG_RE = re.compile("<" + TAG_BODY + ">")
+
+def _label_date(text: str):
+    m = UPDATED_LABEL_RE.search(text)
+    if m:
+        ds = m.group("date")
+        txt, dt = parse_possible_date(ds)
+        if dt:
+            return f"{m.group(1).title()}: {ds}", dt
+    return None, None
+
+def _meta_contents(html: str) -> Dict[str, str]:
+    """First non-empty content per META_DATE_PROPERTIES property."""
+    found: Dict[str, str] = {}
+    for tag in META_TAG_RE.findall(html):
+        if "_time" not in tag:
+            continue
+        attrs = {k.lower(): a or b or c for k, a, b, c in META_ATTR_RE.findall(tag)}
+        prop, content = attrs.get("property"), attrs.get("content")
+        if prop in META_DATE_PROPERTIES and content and prop not in found:
+            found[prop] = unescape(content)
+    return found
+
+def _visible_text(html: str) -> str:
+    """Roughly the page's visible text: no scripts, styles, comments or attributes."""
+    return unescape(TAG_RE.sub(" ", NON_TEXT_RE.sub(" ", html)))
+
+def _parse_detail_dom(html: str):
+    """Meta tags, then visible labels, read from a real lxml tree."""
     try:
-        r = s.get(urljoin(AMAZON_BASE, "job_categories/software-development"), timeout=HTTP_TIMEOUT)
-        if r.ok:
-            jobs += extract_from_amazon_html(r.text, role_keywords)
+        doc = lxml_html.fromstring(html)
     except Exception:
-        pass
-    for params in ({"category": "Software Development"}, {"query": "software"}):
+        return None, None
+    for name in META_DATE_PROPERTIES:
+        content = doc.xpath("//meta[@property=$n]/@content", n=name, smart_strings=False)[:1]
+        if content and content[0]:
+            txt, dt = parse_possible_date(content[0])
+            if dt:
+                return txt or content[0], dt
+    etree.strip_elements(doc, "script", "style", with_tail=False)
+    return _label_date(" ".join(doc.xpath("//text()", smart_strings=False)))
+
+def _parse_detail(html: str):
+    """Return (posted_text, posted_dt) found in a job detail page; runs in PARSE_POOL.
+
+    Same order as a DOM walk (JSON-LD, meta tags, visible labels), by regex over the markup
+    first; a tree is only built when that finds nothing.
+    """
+    for raw in LD_JSON_RE.findall(html):
         try:
-            r = s.get(urljoin(AMAZON_BASE, "search"), params=params, timeout=HTTP_TIMEOUT)
-            if r.ok:
-                jobs += extract_from_amazon_html(r.text, role_keywords)
+            data = json_loads(raw or "{}")
         except Exception:
-            pass
-    uniq = {(j["title"], j["link"]): j for j in jobs}
-    return list(uniq.values())
-
-def enrich_posted_dates(jobs: List[Dict[str, Any]], s: requests.Session, limit: int):
-    fetched = 0
-    for j in jobs:
-        if j.get("_posted_dt"):
             continue
-        if fetched >= limit:
-            break
-        link = j.get("link")
-        if not link:
-            continue
-        try:
-            r = s.get(link, timeout=HTTP_TIMEOUT)
-            if not r.ok:
-                continue
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # JSON-LD
-            found = False
-            for script in soup.find_all("script", type="application/ld+json"):
-                try:
-                    data = json.loads(script.string or script.text or "{}")
-                except Exception:
-                    continue
-                objs = data if isinstance(data, list) else [data]
-                for obj in objs:
-                    if isinstance(obj, dict):
-                        for key in ("datePosted", "dateModified", "datePublished"):
-                            if key in obj:
-                                txt, dt = parse_possible_date(str(obj[key]))
-                                if dt:
-                                    j["_posted_dt"] = dt
-                                    j["posted_text"] = txt or str(obj[key])
-                                    found = True
-                                    break
-                    if found: break
-                if found: break
-
-            # Meta tags
-            if not j.get("_posted_dt"):
-                for name in ("article:published_time", "article:modified_time", "og:updated_time"):
-                    m = soup.find("meta", attrs={"property": name})
-                    if m and m.get("content"):
-                        txt, dt = parse_possible_date(m["content"])
+        objs = data if isinstance(data, list) else [data]
+        for obj in objs:
+            if isinstance(obj, dict):
+                for key in ("datePosted", "dateModified", "datePublished"):
+                    if key in obj:
+                        txt, dt = parse_possible_date(str(obj[key]))
                         if dt:
-                            j["_posted_dt"] = dt
-                            j["posted_text"] = txt or m["content"]
-                            found = True
-                            break
-
-            # Visible labels
-            if not j.get("_posted_dt"):
-                m = UPDATED_LABEL_RE.search(soup.get_text(" ", strip=True))
-                if m:
-                    ds = m.group("date")
-                    txt, dt = parse_possible_date(ds)
-                    if dt:
-                        j["_posted_dt"] = dt
-                        j["posted_text"] = f"{m.group(1).title()}: {ds}"
+                            return txt or str(obj[key]), dt
+
+    metas = _meta_contents(html)
+    for name in META_DATE_PROPERTIES:
+        content = metas.get(name)
+        if content:
+            txt, dt = parse_possible_date(content)
+            if dt:
+                return txt or content, dt
+
+    # Tags become spaces, so a label and its date in sibling elements still line up.
+    txt, dt = _label_date(_visible_text(html))
+    if dt:
+        return txt, dt
+    # Markup the regexes can't read (odd quoting, broken tags): let a real parser look.
+    return _parse_detail_dom(html)
+
+def load_detail_cache(links: List[str]) -> Dict[str, Dict[str, Any]]:
+    if not links:
+        return {}
+    try:
+        with SessionLocal() as db:
+            rows = db.query(JobDetail).filter(JobDetail.link.in_(links)).all()
+            return {
+                r.link: {
+                    "etag": r.etag, "last_modified": r.last_modified, "posted_dt": r.posted_dt,
+                    "posted_text": r.posted_text, "fetched_at": r.fetched_at,
+                }
+                for r in rows
+            }
+    except SQLAlchemyError:
+        return {}
+
+DETAIL_CACHE_COLUMNS = ("etag", "last_modified", "posted_dt", "posted_text", "fetched_at")
+
+def save_detail_cache(entries: Dict[str, Dict[str, Any]]):
+    if not entries:
+        return
+    # One INSERT ... ON CONFLICT DO UPDATE: concurrent runs writing the same link can't race
+    # between a SELECT and an INSERT the way Session.merge() does.
+    stmt = sqlite_insert(JobDetail)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["link"], set_={c: stmt.excluded[c] for c in DETAIL_CACHE_COLUMNS},
+    )
+    try:
+        with SessionLocal() as db, db.begin():
+            db.execute(stmt, [{"link": link, **e} for link, e in entries.items()])
+    except SQLAlchemyError:
+        pass
+
+async def _get_capped(client: httpx.AsyncClient, link: str, cap: int, headers: Dict[str, str]):
+    """GET link but stop reading after cap bytes; returns (response, text, truncated)."""
+    async with client.stream("GET", link, headers=headers) as r:
+        if not r.is_success:
+            return r, "", False
+        buf = bytearray()
+        truncated = False
+        async for chunk in r.aiter_bytes():
+            buf += chunk
+            if len(buf) >= cap:
+                truncated = True
+                break
+        return r, bytes(buf[:cap]).decode(r.charset_encoding or "utf-8", errors="replace"), truncated
+
+async def enrich_posted_dates(jobs: List[Dict[str, Any]], client: httpx.AsyncClient,
+                              limit: int, max_age_days: int):
+    pending = [j for j in jobs if not j.get("_posted_dt") and j.get("link")]
+    cache = await asyncio.to_thread(load_detail_cache, [j["link"] for j in pending])
+    now = datetime.utcnow()
+    # A posting's date never changes, but keep entries at least as long as the age window.
+    ttl = timedelta(days=max(DETAIL_CACHE_DAYS, max_age_days))
+
+    to_fetch = []
+    for j in pending:
+        hit = cache.get(j["link"])
+        if hit and hit["posted_dt"] and now - hit["fetched_at"] < ttl:
+            j["_posted_dt"] = hit["posted_dt"]
+            j["posted_text"] = hit["posted_text"]
+        else:
+            to_fetch.append(j)
+
+    sem = asyncio.Semaphore(DETAIL_FETCH_CONCURRENCY)
+    updates: Dict[str, Dict[str, Any]] = {}
+
+    async def fetch(j: Dict[str, Any]):
+        hit = cache.get(j["link"])
+        headers = {}
+        if hit and hit["etag"]:
+            headers["If-None-Match"] = hit["etag"]
+        if hit and hit["last_modified"]:
+            headers["If-Modified-Since"] = hit["last_modified"]
+        try:
+            async with sem:
+                r, html, truncated = await _get_capped(client, j["link"], DETAIL_HEAD_BYTES, headers)
+            if r.status_code == 304 and hit:
+                txt, dt = hit["posted_text"], hit["posted_dt"]
+                etag, last_modified = hit["etag"], hit["last_modified"]
+            elif r.is_success:
+                txt, dt = await run_in_parse_pool(_parse_detail, html)
+                if not dt and truncated:
+                    # Nothing in the head of the page; look a little further before giving up.
+                    async with sem:
+                        r2, html, _ = await _get_capped(client, j["link"], DETAIL_MAX_BYTES,
+                                                        {"Range": f"bytes=0-{DETAIL_MAX_BYTES - 1}"})
+                    if r2.is_success:
+                        txt, dt = await run_in_parse_pool(_parse_detail, html)
+                etag, last_modified = r.headers.get("etag"), r.headers.get("last-modified")
+            else:
+                return
+            if dt:
+                j["_posted_dt"] = dt
+                j["posted_text"] = txt
+            updates[j["link"]] = {
+                "etag": etag, "last_modified": last_modified,
+                "posted_dt": dt, "posted_text": txt, "fetched_at": now,
+            }
+        except BrokenProcessPool:
+            raise
         except Exception:
             pass
-        fetched += 1
+
+    await asyncio.gather(*[fetch(j) for j in to_fetch[:limit]])
+    await asyncio.to_thread(save_detail_cache, updates)
 
 def filter_by_age(jobs: List[Dict[str, Any]], max_age_days: int) -> List[Dict[str, Any]]:
+    # Every path that sets posted_text has already parsed it into _posted_dt (None when
+    # unparseable), so there is nothing left to re-parse here.
     cutoff = datetime.utcnow() - timedelta(days=max_age_days)
-    fresh = []
-    for j in jobs:
-        dt = j.get("_posted_dt")
-        if not dt and j.get("posted_text"):
-            _, dt = parse_possible_date(j["posted_text"])
-        if dt and dt >= cutoff:
-            fresh.append(j)
-    return fresh
-
-def fetch_amazon_jobs(role_keywords: List[str], max_age_days: int, detail_fetch_limit: int) -> List[Dict[str, Any]]:
-    s = make_amazon_session()
-    jobs = try_amazon_json(s, role_keywords)
-    if not jobs:
-        jobs = try_amazon_html(s, role_keywords)
-    enrich_posted_dates(jobs, s, limit=detail_fetch_limit)
+    return [j for j in jobs if (dt := j.get("_posted_dt")) and dt >= cutoff]
+
+async def fetch_amazon_jobs(role_keywords: List[str], max_age_days: int, detail_fetch_limit: int) -> List[Dict[str, Any]]:
+    kw_re = keywords_regex(role_keywords)
+    client = await make_amazon_client()
+    try:
+        jobs = await try_amazon_json(client, kw_re)
+        if not jobs:
+            jobs = await try_amazon_html(client, kw_re)
+        await enrich_posted_dates(jobs, client, limit=detail_fetch_limit, max_age_days=max_age_days)
+    finally:
+        await client.aclose()
     jobs = filter_by_age(jobs, max_age_days)
     return jobs
 
@@ -364,47 +636,22 @@ def send_email_html(recipient: str, subject: str, html: str):
         raise RuntimeError(f"SMTP error: {type(e).__name__}: {e}") from e
 
 def render_email(company_name: str, role_keywords: List[str], max_age_days: int, jobs: List[Dict[str, Any]]) -> str:
-    if jobs:
-        rows = "".join(
-            f'<tr>'
-            f'<td><a href="{j["link"]}">{j["title"]}</a></td>'
-            f'<td>{j.get("location","")}</td>'
-            f'<td>{j.get("posted_text","")}</td>'
-            f'</tr>' for j in jobs
-        )
-        html = f"""
-        <h2>{company_name} careers (last {max_age_days} days)</h2>
-        <p>Filter: {", ".join(role_keywords) if role_keywords else "(none)"} </p>
-        <table border="1" cellpadding="6" cellspacing="0">
-          <tr><th>Title</th><th>Location</th><th>Posted / Updated</th></tr>
-          {rows}
-        </table>
-        <p>Total (fresh): {len(jobs)}</p>
-        """
-    else:
-        html = f"<h2>No recent matches (≤ {max_age_days} days) for {company_name}</h2>"
-    return html
+    # Compiled once by the Jinja environment and autoescaped (.html), so scraped titles can't break the markup.
+    return templates.get_template("email.html").render(
+        company=company_name, role_keywords=role_keywords, max_age_days=max_age_days, jobs=jobs,
+    )
 
 # ---------- Routes ----------
 @app.get("/", response_class=HTMLResponse)
-def index(request: Request):
+async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/companies")
-def list_companies():
-    db = SessionLocal()
-    data = [
-        {
-            "id": c.id, "name": c.name, "list_url": c.list_url,
-            "role_keywords": c.role_keywords, "max_age_days": c.max_age_days,
-            "detail_fetch_limit": c.detail_fetch_limit, "active": c.active
-        }
-        for c in db.query(Company).order_by(Company.id.desc()).all()
-    ]
-    return {"companies": data}
+async def list_companies():
+    return {"companies": list((await company_snapshot_async()).values())}
 
 @app.post("/companies")
-def create_company(payload: Dict[str, Any]):
+def create_company(payload: Dict[str, Any], db: Session = Depends(get_db)):
     name = payload.get("name") or payload.get("company")
     list_url = payload.get("list_url") or payload.get("careers")
     role_keywords = payload.get("role_keywords") or payload.get("keywords") or "software,developer,engineer"
@@ -415,64 +662,69 @@ def create_company(payload: Dict[str, Any]):
     if not name or not list_url:
         raise HTTPException(status_code=400, detail="name/company and list_url/careers are required")
 
-    db = SessionLocal()
-    if db.query(Company).filter(Company.name == name).first():
-        raise HTTPException(status_code=409, detail="Company with this name already exists")
-
     c = Company(
         name=name, list_url=list_url, role_keywords=role_keywords,
         job_link_regex=None, max_age_days=max_age_days,
         detail_fetch_limit=detail_fetch_limit, active=active
     )
-    db.add(c); db.commit()
+    db.add(c)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Company with this name already exists")
+    invalidate_company_cache()
     return {"ok": True, "id": c.id}
 
 @app.post("/run/{company_id}")
-def run_company(company_id: int, dry_run: bool = Query(False)):
-    db = SessionLocal()
-    c = db.query(Company).filter(Company.id == company_id).first()
+async def run_company(company_id: int, dry_run: bool = Query(False)):
+    c = (await company_snapshot_async()).get(company_id)
     if not c:
         raise HTTPException(status_code=404, detail="Company not found")
 
-    host = urlparse(c.list_url).netloc.lower()
-    role_keys = parse_keywords(c.role_keywords)
+    host = urlparse(c["list_url"]).netloc.lower()
+    role_keys = parse_keywords(c["role_keywords"])
 
     if "amazon.jobs" not in host:
-        return {"ok": True, "company": c.name, "ran": False,
+        return {"ok": True, "company": c["name"], "ran": False,
                 "reason": "Only Amazon is supported in this local prototype."}
 
-    jobs = fetch_amazon_jobs(role_keys, c.max_age_days, c.detail_fetch_limit)
+    try:
+        jobs = await fetch_amazon_jobs(role_keys, c["max_age_days"], c["detail_fetch_limit"])
+    except BrokenProcessPool:
+        # Reporting ok with whatever survived would email "No recent matches" for a crash.
+        raise HTTPException(status_code=503, detail="HTML parser workers crashed; retry the run")
 
     if dry_run:
-        return {"ok": True, "company": c.name, "count": len(jobs), "jobs": jobs}
+        return {"ok": True, "company": c["name"], "count": len(jobs), "jobs": jobs}
 
     # Env-only recipient
     recipient = os.getenv("RECIPIENT_EMAIL")
     if not recipient:
         raise HTTPException(status_code=500, detail="RECIPIENT_EMAIL env var missing")
 
-    html = render_email(c.name, role_keys, c.max_age_days, jobs)
-    subject = f"[JobWatch Local] {c.name} roles (≤{c.max_age_days}d)"
+    html = render_email(c["name"], role_keys, c["max_age_days"], jobs)
+    subject = f"[JobWatch Local] {c['name']} roles (≤{c['max_age_days']}d)"
     try:
-        send_email_html(recipient, subject, html)
+        # smtplib blocks for the whole SMTP exchange; keep it off the event loop.
+        await asyncio.to_thread(send_email_html, recipient, subject, html)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email send failed: {e}")
 
-    return {"ok": True, "company": c.name, "count": len(jobs)}
+    return {"ok": True, "company": c["name"], "count": len(jobs)}
 
 @app.delete("/companies/{company_id}")
-def delete_company(company_id: int):
-    db = SessionLocal()
-    c = db.query(Company).filter(Company.id == company_id).first()
-    if not c:
+def delete_company(company_id: int, db: Session = Depends(get_db)):
+    with db.begin():
+        deleted = db.query(Company).filter(Company.id == company_id).delete()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Company not found")
-    db.delete(c)
-    db.commit()
+    invalidate_company_cache()
     return {"ok": True}
 
 @app.post("/companies/reset")
-def reset_companies():
-    db = SessionLocal()
-    db.query(Company).delete()
-    db.commit()
+def reset_companies(db: Session = Depends(get_db)):
+    with db.begin():
+        db.query(Company).delete()
+    invalidate_company_cache()
     return {"ok": True}
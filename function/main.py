@@ -3,12 +3,21 @@ import re
 import ssl
 import smtplib
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from html import escape
 from urllib.parse import urljoin
 from email.message import EmailMessage
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from lxml import etree, html as lxml_html
+
+try:
+    from orjson import loads as json_loads  # C-extension decoder, 2-5x faster than json
+except ImportError:
+    json_loads = json.loads
 
 # ------------------------------
 # Config (hard-coded for this test)
@@ -24,74 +33,112 @@ MAX_RESULTS = 250
 MAX_AGE_DAYS = 7
 # How many detail pages to hit to discover dates
 DETAIL_FETCH_LIMIT = 40
+# Detail pages fetched in parallel (network-bound, so threads are enough)
+DETAIL_FETCH_WORKERS = 12
 
 # ------------------------------
-# Date parsing helpers
+# Compiled regexes
 # ------------------------------
-DATE_RE = re.compile(r"\b(\d{1,2}/\d{1,2}/\d{4})\b")  # 10/31/2025
-RELATIVE_RE = re.compile(r"(\d+)\s+(day|days|hour|hours|week|weeks|month|months)\s+ago", re.I)
-ISO_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")  # 2025-10-31
-MONTH_NAME_DATE_RE = re.compile(  # Oct 31, 2025
-    r"\b(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|"
-    r"Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+"
-    r"(\d{1,2}),\s*(\d{4})\b",
-    re.I,
+LOCATION_NAMES = [
+    "United States", "India", "Canada", "Remote", "Hybrid", "Seattle", "Bangalore", "Hyderabad",
+]
+MONTH_PATTERNS = (
+    "Jan(?:uary)?", "Feb(?:ruary)?", "Mar(?:ch)?", "Apr(?:il)?", "May", "Jun(?:e)?",
+    "Jul(?:y)?", "Aug(?:ust)?", "Sep(?:tember)?", "Oct(?:ober)?", "Nov(?:ember)?", "Dec(?:ember)?",
+)
+# One branch per month, named m01..m12 and spanning the whole "Oct 31, 2025" match, so the month
+# is int(m.lastgroup[1:]) and day/year are the two groups after m.lastindex (no lower() + dict probe).
+MONTH_NAME_BRANCHES = "|".join(
+    rf"(?P<m{i:02d}>{p}\s+(\d{{1,2}}),\s*(\d{{4}}))" for i, p in enumerate(MONTH_PATTERNS, 1)
+)
+# Every supported date form in one pattern, ordered by specificity; the first (leftmost) match wins.
+DATE_PATTERN = (
+    r"\b(?P<iso>\d{4}-\d{2}-\d{2})\b"                                    # 2025-10-31
+    r"|\b(?:" + MONTH_NAME_BRANCHES + r")\b"                              # Oct 31, 2025
+    r"|\b(?P<us>\d{1,2}/\d{1,2}/\d{4})\b"                                # 10/31/2025
+    r"|(?P<rel>(?P<n>\d+)\s+(?P<unit>day|days|hour|hours|week|weeks|month|months)\s+ago)"
 )
 
-MONTH_INDEX = {
-    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
-    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
-    "aug": 8, "august": 8, "sep": 9, "september": 9, "oct": 10, "october": 10,
-    "nov": 11, "november": 11, "dec": 12, "december": 12
+# Every pattern the module uses, compiled once at import and held here rather than in
+# re's bounded internal cache.
+_RX = {
+    # Title filter: one case-insensitive scan instead of a lower() + substring test per keyword
+    "role": re.compile("|".join(map(re.escape, ROLE_KEYWORDS)), re.I),
+    "iso": re.compile(r"\b(\d{4}-\d{2}-\d{2})\b"),                    # 2025-10-31
+    "date": re.compile(DATE_PATTERN, re.I),
+    # Single pass over a detail page's text: an "Updated:/Posted: <date>" label, or any bare
+    # date form parse_possible_date understands.
+    "detail_date": re.compile(
+        r"(?P<label>Updated|Posted)\s*:?\s*(?P<date>(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{4})|"
+        r"(?:[A-Za-z]{3,9}\s+\d{1,2},\s*\d{4}))"
+        "|" + DATE_PATTERN,
+        re.I,
+    ),
+    "jobpath": re.compile(r"^(/en)?/jobs/"),                             # "/en/jobs/..." or "/jobs/..."
+    "loc": re.compile("|".join(map(re.escape, LOCATION_NAMES))),
 }
 
+# ------------------------------
+# Job record
+# ------------------------------
+@dataclass(slots=True)
+class Job:
+    title: str
+    company: str
+    location: str
+    link: str
+    posted_text: str
+    posted_dt: datetime | None = None  # naive UTC, kept for filtering
+    posted_ts: float = 0.0             # to_ts(posted_dt)
+
+# ------------------------------
+# Date parsing helpers
+# ------------------------------
+RELATIVE_UNITS = {
+    "hour": timedelta(hours=1), "hours": timedelta(hours=1),
+    "day": timedelta(days=1),   "days": timedelta(days=1),
+    "week": timedelta(weeks=1), "weeks": timedelta(weeks=1),
+    "month": timedelta(days=30), "months": timedelta(days=30),
+}
+
+def _match_date(text: str):
+    """Return (matched_text, absolute_dt, relative_delta); at most one of dt/delta is set."""
+    for m in _RX["date"].finditer(text):
+        kind = m.lastgroup
+        try:
+            if kind == "iso":
+                return m.group("iso"), datetime.strptime(m.group("iso"), "%Y-%m-%d"), None
+            if kind == "us":
+                return m.group("us"), datetime.strptime(m.group("us"), "%m/%d/%Y"), None
+            if kind == "rel":
+                return m.group("rel"), None, int(m.group("n")) * RELATIVE_UNITS[m.group("unit").lower()]
+            i = m.lastindex  # month branch m01..m12
+            dt = datetime(year=int(m.group(i + 2)), month=int(kind[1:]), day=int(m.group(i + 1)))
+            return m.group(i), dt, None
+        except Exception:
+            continue  # e.g. 2025-13-45; try the next candidate
+    return None, None, None
+
+# Short inputs ("2025-10-31", "7 days ago") repeat across listings; page-sized text never does.
+# The cache holds the relative delta, not now - delta, so a warm instance never serves stale dates.
+# Keys must be plain str: an lxml smart string would pin its whole document in the cache.
+SHORT_DATE_TEXT = 64
+_match_short_date = lru_cache(maxsize=2048)(_match_date)
+
 def parse_possible_date(text: str):
     """Return (posted_text, posted_dt or None) from mixed text (supports ISO, MM/DD/YYYY, 'Oct 31, 2025', or 'X days ago')."""
     if not text:
         return None, None
+    txt, dt, delta = (_match_short_date if len(text) <= SHORT_DATE_TEXT else _match_date)(text)
+    if delta is not None:
+        dt = datetime.utcnow() - delta
+    return txt, dt
 
-    # ISO first
-    m_iso = ISO_DATE_RE.search(text)
-    if m_iso:
-        try:
-            return m_iso.group(1), datetime.strptime(m_iso.group(1), "%Y-%m-%d")
-        except Exception:
-            pass
+EPOCH = datetime(1970, 1, 1)
 
-    # Month name form
-    m_name = MONTH_NAME_DATE_RE.search(text)
-    if m_name:
-        try:
-            mon = MONTH_INDEX[m_name.group(1).lower()]
-            day = int(m_name.group(2))
-            yr = int(m_name.group(3))
-            dt = datetime(year=yr, month=mon, day=day)
-            return m_name.group(0), dt
-        except Exception:
-            pass
-
-    # MM/DD/YYYY
-    m = DATE_RE.search(text)
-    if m:
-        try:
-            return m.group(1), datetime.strptime(m.group(1), "%m/%d/%Y")
-        except Exception:
-            pass
-
-    # Relative "X days ago"
-    m2 = RELATIVE_RE.search(text)
-    if m2:
-        n = int(m2.group(1))
-        unit = m2.group(2).lower()
-        delta = {
-            "hour": timedelta(hours=n), "hours": timedelta(hours=n),
-            "day": timedelta(days=n),   "days": timedelta(days=n),
-            "week": timedelta(weeks=n), "weeks": timedelta(weeks=n),
-            "month": timedelta(days=30*n), "months": timedelta(days=30*n),
-        }[unit]
-        return m2.group(0), datetime.utcnow() - delta
-
-    return None, None
+def to_ts(dt) -> float:
+    """Naive-UTC datetime -> POSIX seconds (0.0 when unknown), for cheap age comparisons."""
+    return (dt - EPOCH).total_seconds() if dt else 0.0
 
 def parse_iso_dt(s: str):
     if not s:
@@ -100,7 +147,7 @@ def parse_iso_dt(s: str):
     try:
         return datetime.fromisoformat(s)
     except Exception:
-        m = ISO_DATE_RE.search(s)
+        m = _RX["iso"].search(s)
         if m:
             try:
                 return datetime.strptime(m.group(1), "%Y-%m-%d")
@@ -111,8 +158,6 @@ def parse_iso_dt(s: str):
 # ------------------------------
 # Link normalization
 # ------------------------------
-JOB_PATH_RE = re.compile(r"^(/en)?/jobs/")  # "/en/jobs/..." or "/jobs/..."
-
 def normalize_job_link(link: str) -> str:
     """Return canonical amazon.jobs job URL or '' if not a job page."""
     if not link:
@@ -122,15 +167,20 @@ def normalize_job_link(link: str) -> str:
         if "amazon.jobs" in link and "/jobs/" in link:
             return link
         return ""  # reject non-job domains (e.g., account.amazon.com)
-    if JOB_PATH_RE.search(link):
+    if _RX["jobpath"].search(link):
         return urljoin(JOBS_ROOT, link)
     return ""
 
 # ------------------------------
 # Session / headers
 # ------------------------------
-def make_session() -> requests.Session:
-    s = requests.Session()
+def make_session() -> httpx.Client:
+    # HTTP/2 lets the parallel detail fetches share one TLS connection to amazon.jobs;
+    # the client is thread-safe, so the enrich workers all use this one instance.
+    s = httpx.Client(
+        http2=True, timeout=HTTP_TIMEOUT, follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    )
     s.headers.update({
         "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                        "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -143,7 +193,7 @@ def make_session() -> requests.Session:
         "Pragma": "no-cache",
     })
     try:
-        s.get(BASE_URL, timeout=HTTP_TIMEOUT)  # warm-up cookies
+        s.get(BASE_URL)  # warm-up cookies
     except Exception:
         pass
     return s
@@ -151,7 +201,7 @@ def make_session() -> requests.Session:
 # ------------------------------
 # JSON attempt (prefer job_path over apply links)
 # ------------------------------
-def try_amazon_json(s: requests.Session) -> list[dict]:
+def try_amazon_json(s: httpx.Client) -> list[Job]:
     candidates = [
         ("https://www.amazon.jobs/en/search.json",
          [("result_limit", "100"), ("offset", "0"), ("category[]", "Software Development")]),
@@ -160,13 +210,13 @@ def try_amazon_json(s: requests.Session) -> list[dict]:
         ("https://www.amazon.jobs/en/search.json",
          [("result_limit", "100"), ("offset", "0"), ("query", "software")]),
     ]
-    jobs = []
+    seen: dict[tuple[str, str], Job] = {}
     for url, params in candidates:
         try:
-            r = s.get(url, params=params, timeout=HTTP_TIMEOUT)
-            if not r.ok:
+            r = s.get(url, params=params)
+            if not r.is_success:
                 continue
-            data = r.json()
+            data = json_loads(r.content)  # bytes straight in; skips the text decode
         except Exception:
             continue
 
@@ -183,197 +233,219 @@ def try_amazon_json(s: requests.Session) -> list[dict]:
         for lst in lists:
             for it in lst:
                 title = (it.get("title") or it.get("job_title") or "").strip()
-                if not title or not any(k in title.lower() for k in ROLE_KEYWORDS):
+                if not title or not _RX["role"].search(title):
                     continue
-                link = (it.get("job_path") or it.get("absolute_url") or "").strip()
-                if not link:
-                    link = (it.get("apply_url") or it.get("url_next_step") or "").strip()
-                link = normalize_job_link(link)
+                # normalize_job_link strips, so the raw JSON value goes straight in
+                link = normalize_job_link(it.get("job_path") or it.get("absolute_url")
+                                          or it.get("apply_url") or it.get("url_next_step"))
                 if not link:
                     continue
-                location = (it.get("location") or it.get("normalized_location")
-                            or it.get("city") or "") or ""
-                posted_text = (it.get("posted_date") or it.get("posting_date")
-                               or it.get("posted_at") or "")
-                _, posted_dt = parse_possible_date(str(posted_text))
-                jobs.append({
-                    "title": title,
-                    "company": COMPANY_NAME,
-                    "location": location,
-                    "link": link,
-                    "posted_text": str(posted_text) if posted_text else "",
-                    "_posted_dt": posted_dt,  # keep dt for filtering
-                })
-        if jobs:
+                key = (title, link)
+                if key in seen:
+                    continue
+                # JSON may hold a structured location; Job fields stay str so the email can escape them
+                location = str(it.get("location") or it.get("normalized_location")
+                               or it.get("city") or "")
+                posted_text = str(it.get("posted_date") or it.get("posting_date")
+                                  or it.get("posted_at") or "")
+                _, posted_dt = parse_possible_date(posted_text)
+                seen[key] = Job(title, COMPANY_NAME, location, link, posted_text,
+                                posted_dt, to_ts(posted_dt))
+                if len(seen) >= MAX_RESULTS:
+                    return list(seen.values())  # enough; skip the rest of the hits
+        if seen:
             break
 
-    uniq = {(j["title"], j["link"]): j for j in jobs if j.get("link")}
-    return list(uniq.values())[:MAX_RESULTS]
+    return list(seen.values())[:MAX_RESULTS]
 
 # ------------------------------
 # HTML fallback (anchors that are job paths)
 # ------------------------------
-def extract_from_html_listings(html: str) -> list[dict]:
-    soup = BeautifulSoup(html, "html.parser")
-    anchors = soup.find_all("a", href=True)
-    jobs = []
-    for a in anchors:
-        link = normalize_job_link(a["href"].strip())
+# Only anchors that can be job pages; normalize_job_link still has the final say.
+# normalize-space: hrefs like " /jobs/2/sde" count, since normalize_job_link strips them anyway.
+JOB_ANCHORS_XPATH = ('//a[@href and (starts-with(normalize-space(@href),"/jobs/")'
+                     ' or starts-with(normalize-space(@href),"/en/jobs/")'
+                     ' or contains(@href,"amazon.jobs/"))]')
+
+def extract_from_html_listings(html: str, seen: dict | None = None) -> list[Job]:
+    """Collect job anchors into seen (keyed by (title, link)) and return its values.
+
+    Pass the same seen dict across pages to dedupe before any per-anchor parent-text work.
+    """
+    if seen is None:
+        seen = {}
+    try:
+        doc = lxml_html.fromstring(html)
+    except Exception:
+        return list(seen.values())
+    for a in doc.xpath(JOB_ANCHORS_XPATH):
+        link = normalize_job_link(a.get("href").strip())
         if not link:
             continue
-        title = a.get_text(strip=True)
-        if not title or not any(k in title.lower() for k in ROLE_KEYWORDS):
+        title = " ".join(a.text_content().split())
+        if not title or not _RX["role"].search(title):
             continue
-        parent = a.find_parent()
-        block_text = parent.get_text(" ", strip=True) if parent else title
-        location = ""
-        for kw in ["United States", "India", "Canada", "Remote", "Hybrid",
-                   "Seattle", "Bangalore", "Hyderabad"]:
-            if kw in block_text:
-                location = kw
-                break
+        key = (title, link)
+        if key in seen:
+            continue
+        # Parent text is the expensive part; only pay for it once the title matched.
+        parent = a.getparent()
+        block_text = " ".join(parent.text_content().split()) if parent is not None else title
+        m = _RX["loc"].search(block_text)
+        location = m.group(0) if m else ""
         posted_text, posted_dt = parse_possible_date(block_text)
-        jobs.append({
-            "title": title,
-            "company": COMPANY_NAME,
-            "location": location,
-            "link": link,
-            "posted_text": posted_text or "",
-            "_posted_dt": posted_dt,
-        })
-    uniq = {(j["title"], j["link"]): j for j in jobs}
-    return list(uniq.values())
-
-def try_amazon_html(s: requests.Session) -> list[dict]:
-    jobs = []
+        seen[key] = Job(title, COMPANY_NAME, location, link, posted_text or "",
+                        posted_dt, to_ts(posted_dt))
+    return list(seen.values())
+
+def try_amazon_html(s: httpx.Client) -> list[Job]:
+    seen: dict[tuple[str, str], Job] = {}
+    # A page without "/jobs/" anywhere has no job anchors; skip decoding and parsing it.
     try:
-        r = s.get(urljoin(BASE_URL, "job_categories/software-development"), timeout=HTTP_TIMEOUT)
-        if r.ok:
-            jobs += extract_from_html_listings(r.text)
+        r = s.get(urljoin(BASE_URL, "job_categories/software-development"))
+        if r.is_success and b"/jobs/" in r.content:
+            extract_from_html_listings(r.text, seen)
     except Exception:
         pass
     try:
-        r = s.get(urljoin(BASE_URL, "search"), params={"category": "Software Development"}, timeout=HTTP_TIMEOUT)
-        if r.ok:
-            jobs += extract_from_html_listings(r.text)
+        r = s.get(urljoin(BASE_URL, "search"), params={"category": "Software Development"})
+        if r.is_success and b"/jobs/" in r.content:
+            extract_from_html_listings(r.text, seen)
     except Exception:
         pass
     try:
-        r = s.get(urljoin(BASE_URL, "search"), params={"query": "software"}, timeout=HTTP_TIMEOUT)
-        if r.ok:
-            jobs += extract_from_html_listings(r.text)
+        r = s.get(urljoin(BASE_URL, "search"), params={"query": "software"})
+        if r.is_success and b"/jobs/" in r.content:
+            extract_from_html_listings(r.text, seen)
     except Exception:
         pass
-    uniq = {(j["title"], j["link"]): j for j in jobs}
-    return list(uniq.values())[:MAX_RESULTS]
+    return list(seen.values())[:MAX_RESULTS]
 
 # ------------------------------
 # Enrich missing posting dates from detail page
 # ------------------------------
-UPDATED_LABEL_RE = re.compile(
-    r"(Updated|Posted)\s*:?\s*(?P<date>(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{4})|"
-    r"(?:[A-Za-z]{3,9}\s+\d{1,2},\s*\d{4}))",
-    re.I,
+# Own text of the few elements that mention "updated"/"posted": a few hundred bytes instead of
+# the whole page, which is only joined and scanned when these islands carry no labelled date.
+_LOWER = "translate(., 'UPDATESO', 'updateso')"
+LABEL_TEXT_XPATH = etree.XPath(
+    "//*[self::time or self::span or self::div or self::p or self::li or self::dd]/text()"
+    f"[contains({_LOWER}, 'updated') or contains({_LOWER}, 'posted')]",
+    smart_strings=False,
 )
 
-def enrich_posted_dates(jobs: list[dict], s: requests.Session):
-    fetched = 0
-    for j in jobs:
-        if j.get("_posted_dt"):
-            continue
-        if fetched >= DETAIL_FETCH_LIMIT:
-            break
-        link = j.get("link")
-        if not link:
+def _set_labelled_date(j: Job, m: re.Match) -> bool:
+    ds = m.group("date")
+    txt, dt = parse_possible_date(ds)
+    if not dt:
+        return False
+    j.posted_dt = dt
+    j.posted_text = f"{m.group('label').title()}: {ds}"
+    return True
+
+def _parse_detail(j: Job, html: str):
+    """Fill j's posted_dt / posted_text from a job detail page (JSON-LD, meta tags, visible labels)."""
+    doc = lxml_html.fromstring(html)
+
+    # 1) JSON-LD datePosted / dateModified
+    found = False
+    # smart_strings=False: plain str results, which orjson accepts (it rejects lxml's str subclass)
+    for script in doc.xpath('//script[@type="application/ld+json"]/text()', smart_strings=False):
+        # WebSite / Organization / BreadcrumbList blocks can't help; skip them undecoded.
+        if "datePosted" not in script and "dateModified" not in script:
             continue
         try:
-            r = s.get(link, timeout=HTTP_TIMEOUT)
-            if not r.ok:
-                continue
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # 1) JSON-LD datePosted / dateModified
-            found = False
-            for script in soup.find_all("script", type="application/ld+json"):
-                try:
-                    data = json.loads(script.string or script.text or "{}")
-                except Exception:
-                    continue
-                objs = data if isinstance(data, list) else [data]
-                for obj in objs:
-                    if isinstance(obj, dict):
-                        for key in ("datePosted", "dateModified"):
-                            if key in obj:
-                                ds = str(obj[key])
-                                txt, dt = parse_possible_date(ds)
-                                if dt:
-                                    j["_posted_dt"] = dt
-                                    j["posted_text"] = txt or ds
-                                    found = True
-                                    break
-                    if found:
-                        break
-                if found:
-                    break
-
-            # 2) Meta tags (common on some sites)
-            if not j.get("_posted_dt"):
-                for name in ("article:published_time", "article:modified_time", "og:updated_time"):
-                    m = soup.find("meta", attrs={"property": name})
-                    if m and m.get("content"):
-                        txt, dt = parse_possible_date(m["content"])
+            data = json_loads(script)
+        except Exception:
+            continue
+        objs = data if isinstance(data, list) else [data]
+        for obj in objs:
+            if isinstance(obj, dict):
+                for key in ("datePosted", "dateModified"):
+                    if key in obj:
+                        ds = str(obj[key])
+                        txt, dt = parse_possible_date(ds)
                         if dt:
-                            j["_posted_dt"] = dt
-                            j["posted_text"] = txt or m["content"]
+                            j.posted_dt = dt
+                            j.posted_text = txt or ds
                             found = True
                             break
+            if found:
+                break
+        if found:
+            break
 
-            # 3) Visible "Updated: ..." or "Posted: ..." text
-            if not j.get("_posted_dt"):
-                text = soup.get_text(" ", strip=True)
-                m = UPDATED_LABEL_RE.search(text)
-                if m:
-                    ds = m.group("date")
-                    txt, dt = parse_possible_date(ds)
-                    if dt:
-                        j["_posted_dt"] = dt
-                        j["posted_text"] = f"{m.group(1).title()}: {ds}"
-
-            # 4) Last fallback: anything that looks like a date
-            if not j.get("_posted_dt"):
-                txt, dt = parse_possible_date(soup.get_text(" ", strip=True))
+    # 2) Meta tags (common on some sites)
+    if not j.posted_dt:
+        for name in ("article:published_time", "article:modified_time", "og:updated_time"):
+            content = doc.xpath("//meta[@property=$n]/@content", n=name, smart_strings=False)[:1]
+            if content and content[0]:
+                txt, dt = parse_possible_date(content[0])
                 if dt:
-                    j["_posted_dt"] = dt
-                    if not j.get("posted_text"):
-                        j["posted_text"] = txt or ""
-        except Exception:
-            pass
-        fetched += 1
+                    j.posted_dt = dt
+                    j.posted_text = txt or content[0]
+                    found = True
+                    break
+
+    # 3) Visible "Updated: ..." or "Posted: ..." text, else 4) anything that looks like a date.
+    #    Labelled text islands first; the full-page scan below still prefers a label anywhere
+    #    over a bare date. JSON-LD has been read by now, so inline JS/CSS can go; with_tail=False
+    #    keeps the text that follows each stripped element.
+    if not j.posted_dt:
+        etree.strip_elements(doc, "script", "style", "noscript", with_tail=False)
+        for m in _RX["detail_date"].finditer(" ".join(LABEL_TEXT_XPATH(doc))):
+            if m.group("label") and _set_labelled_date(j, m):
+                return
+        fallback = None
+        for m in _RX["detail_date"].finditer(" ".join(doc.xpath("//text()", smart_strings=False))):
+            if m.group("label"):
+                if _set_labelled_date(j, m):
+                    return
+            elif fallback is None:
+                txt, dt = parse_possible_date(m.group(0))
+                if dt:
+                    fallback = (txt, dt)
+        if fallback:
+            j.posted_dt = fallback[1]
+            if not j.posted_text:
+                j.posted_text = fallback[0] or ""
+
+def enrich_posted_dates(jobs: list[Job], s: httpx.Client):
+    jobs_to_fetch = [j for j in jobs if not j.posted_dt and j.link][:DETAIL_FETCH_LIMIT]
+    with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as ex:
+        futures = {ex.submit(s.get, j.link): j for j in jobs_to_fetch}
+        # Each Job is only touched by the handler for its own future.
+        for fut in as_completed(futures):
+            j = futures[fut]
+            try:
+                r = fut.result()
+                if not r.is_success:
+                    continue
+                _parse_detail(j, r.text)
+                j.posted_ts = to_ts(j.posted_dt)
+            except Exception:
+                pass
 
 # ------------------------------
 # Filter by age (<= MAX_AGE_DAYS)
 # ------------------------------
-def filter_by_age(jobs: list[dict]) -> list[dict]:
-    cutoff = datetime.utcnow() - timedelta(days=MAX_AGE_DAYS)
-    fresh = []
-    for j in jobs:
-        dt = j.get("_posted_dt")
-        if not dt:
-            # NEW: also try parsing posted_text with full parser (not just ISO)
-            _, dt = parse_possible_date(j.get("posted_text", ""))
-        if dt and dt >= cutoff:
-            fresh.append(j)
-    return fresh
+def filter_by_age(jobs: list[Job]) -> list[Job]:
+    # posted_text was already run through parse_possible_date wherever it was set, so a
+    # missing timestamp means "no date" and re-parsing would only repeat the same work.
+    cutoff_ts = to_ts(datetime.utcnow() - timedelta(days=MAX_AGE_DAYS))
+    return [j for j in jobs if j.posted_ts >= cutoff_ts]
 
 # ------------------------------
 # Fetch + filter
 # ------------------------------
-def fetch_amazon_jobs() -> list[dict]:
+def fetch_amazon_jobs() -> list[Job]:
     s = make_session()
-    jobs = try_amazon_json(s)
-    if not jobs:
-        jobs = try_amazon_html(s)
-    enrich_posted_dates(jobs, s)        # ensure we have dates when possible
+    try:
+        jobs = try_amazon_json(s)
+        if not jobs:
+            jobs = try_amazon_html(s)
+        enrich_posted_dates(jobs, s)    # ensure we have dates when possible
+    finally:
+        s.close()
     jobs = filter_by_age(jobs)          # keep only recent
     return jobs[:MAX_RESULTS]
 
@@ -405,6 +477,9 @@ def send_email_html(recipient: str, subject: str, html: str):
 # ------------------------------
 # HTTP entry point (2nd gen)
 # ------------------------------
+# One constant template for every row; fields are escaped before they go in.
+EMAIL_ROW = '<tr><td><a href="{0}">{1}</a></td><td>{2}</td><td>{3}</td></tr>'
+
 def scan_jobs_test(request):
     recipient = os.getenv("RECIPIENT_EMAIL")
     if not recipient:
@@ -414,11 +489,8 @@ def scan_jobs_test(request):
         jobs = fetch_amazon_jobs()
         if jobs:
             rows = "".join(
-                f'<tr>'
-                f'<td><a href="{j["link"]}">{j["title"]}</a></td>'
-                f'<td>{j.get("location","")}</td>'
-                f'<td>{j.get("posted_text","")}</td>'
-                f'</tr>'
+                EMAIL_ROW.format(escape(j.link), escape(j.title), escape(j.location),
+                                 escape(j.posted_text))
                 for j in jobs
             )
             html = f"""